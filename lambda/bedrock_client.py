@@ -34,6 +34,7 @@ class BedrockAgentClient:
             tool_calls = []
             full_context = []  # Track complete conversation
             iteration_count = 0  # Track number of Bedrock invocations
+            tokens_used = 0  # Track total tokens reported by the Converse API
             
             def execute_tool(command):
                 try:
@@ -47,7 +48,10 @@ class BedrockAgentClient:
                     result = json.loads(response['Payload'].read())
                     
                     if response['StatusCode'] == 200:
-                        body = json.loads(result.get('body', '{}'))
+                        body = result.get('body', {})
+                        # Older tool Lambda builds returned the body as a JSON string
+                        if isinstance(body, str):
+                            body = json.loads(body)
                         tool_calls.append({
                             'input': {'command': command[:200]},
                             'output': body.get('output', 'No output')[:500]
@@ -156,6 +160,7 @@ Remember: Investigate thoroughly with tools FIRST, then provide your analysis. D
                         }
                     )
                     retry_count = 0
+                    tokens_used += response.get('usage', {}).get('totalTokens', 0)
                     
                 except Exception as e:
                     error_str = str(e)
@@ -300,7 +305,9 @@ Output:
                 'report': final_response if final_response else "Investigation completed but no analysis was generated.",
                 'full_context': full_context,
                 'iteration_count': iteration_count,
-                'tool_calls': tool_calls
+                'tool_calls': tool_calls,
+                'tokens_used': tokens_used,
+                'success': True
             }
             
         except Exception as e:
@@ -326,5 +333,6 @@ Troubleshooting Steps:
                 'report': error_report,
                 'full_context': [],
                 'iteration_count': iteration_count if 'iteration_count' in locals() else 0,
-                'tool_calls': tool_calls if 'tool_calls' in locals() else []
+                'tool_calls': tool_calls if 'tool_calls' in locals() else [],
+                'success': False
             }
\ No newline at end of file
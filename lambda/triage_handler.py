@@ -4,6 +4,8 @@ import boto3
 import time
 from datetime import datetime
 from decimal import Decimal
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import ClientError
 from bedrock_client import BedrockAgentClient
 from prompt_template import PromptTemplate
 from logging_config import configure_logging
@@ -11,6 +13,31 @@ from logging_config import configure_logging
 # Configure logging based on environment variable
 logger = configure_logging()
 
+METRICS_NAMESPACE = 'CloudWatchAlarmTriage'
+
+def emf_emit(namespace, metrics, dimensions=None):
+    """Print metrics to stdout in CloudWatch Embedded Metric Format.
+
+    metrics maps metric name to a (value, unit) tuple. Lambda ships stdout to
+    CloudWatch Logs, which extracts the metrics asynchronously, so this never
+    makes an API call from the handler.
+    """
+    dimensions = dimensions or {}
+    payload = {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': namespace,
+                'Dimensions': [list(dimensions)],
+                'Metrics': [{'Name': name, 'Unit': unit} for name, (_, unit) in metrics.items()]
+            }]
+        },
+        **dimensions
+    }
+    for name, (value, _) in metrics.items():
+        payload[name] = value
+    print(json.dumps(payload))
+
 def save_enhanced_reports_to_s3(alarm_name, alarm_state, investigation_result, event):
     """Save both full context and report-only files to S3 bucket."""
     try:
@@ -136,22 +163,33 @@ def should_investigate(alarm_name, investigation_window_hours=None):
         if investigation_window_hours is None:
             investigation_window_hours = float(os.environ.get('INVESTIGATION_WINDOW_HOURS', '1'))
         
-        response = table.get_item(Key={'alarm_name': alarm_name})
+        now = time.time()
+        window_seconds = investigation_window_hours * 3600
+        ttl_seconds = int(window_seconds)
         
-        if 'Item' in response:
-            last_investigation = float(response['Item']['timestamp'])
-            time_since_investigation = time.time() - last_investigation
-            
-            if time_since_investigation < (investigation_window_hours * 3600):
-                logger.debug(f"Alarm {alarm_name} already investigated {time_since_investigation:.0f} seconds ago")
-                return False, time_since_investigation
-        
-        ttl_seconds = int(investigation_window_hours * 3600)
-        table.put_item(Item={
-            'alarm_name': alarm_name,
-            'timestamp': Decimal(str(time.time())),
-            'ttl': int(time.time() + ttl_seconds)
-        })
+        # One conditional write both checks for and records the investigation.
+        # Expired items can linger until DynamoDB's TTL sweep removes them, so
+        # an entry older than the window is still allowed to be overwritten.
+        try:
+            table.put_item(
+                Item={
+                    'alarm_name': alarm_name,
+                    'timestamp': Decimal(str(now)),
+                    'ttl': int(now + ttl_seconds)
+                },
+                ConditionExpression='attribute_not_exists(alarm_name) OR #ts < :window_start',
+                ExpressionAttributeNames={'#ts': 'timestamp'},
+                ExpressionAttributeValues={':window_start': Decimal(str(now - window_seconds))},
+                ReturnValuesOnConditionCheckFailure='ALL_OLD'
+            )
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+                raise
+            existing = e.response.get('Item', {})
+            last_investigation = float(TypeDeserializer().deserialize(existing['timestamp'])) if 'timestamp' in existing else now
+            time_since_investigation = now - last_investigation
+            logger.debug(f"Alarm {alarm_name} already investigated {time_since_investigation:.0f} seconds ago")
+            return False, time_since_investigation
         
         logger.debug(f"Recording new investigation for alarm {alarm_name} with TTL of {ttl_seconds} seconds")
         return True, 0
@@ -202,6 +240,9 @@ def handler(event, context):
             })
         }
     
+    start_time = time.time()
+    investigation_succeeded = False
+    
     try:
         bedrock = BedrockAgentClient(
             model_id=os.environ['BEDROCK_MODEL_ID'],
@@ -222,6 +263,8 @@ def handler(event, context):
                 raw_report = investigation_result.get('report', 'No report available')
                 iteration_count = investigation_result.get('iteration_count', 0)
                 tool_calls = investigation_result.get('tool_calls', [])
+                # The client reports its own failures as an error report rather than raising
+                investigation_succeeded = investigation_result.get('success', False)
                 
                 # Store the raw report without metadata (metadata goes in the notification header)
                 investigation_result['report'] = raw_report
@@ -229,6 +272,7 @@ def handler(event, context):
             else:
                 # Backward compatibility
                 analysis = investigation_result
+                investigation_succeeded = True
                 
         except Exception as bedrock_error:
             logger.error(f"Bedrock investigation failed: {str(bedrock_error)}")
@@ -253,7 +297,7 @@ Alarm Details:
 This is an automated fallback message when AI investigation fails.
 """
             # Create a result dict for consistency
-            investigation_result = {'report': analysis, 'full_context': [], 'iteration_count': 0, 'tool_calls': []}
+            investigation_result = {'report': analysis, 'full_context': [], 'iteration_count': 0, 'tool_calls': [], 'success': False}
         
         # Save enhanced reports to S3
         report_location, context_location, json_location = save_enhanced_reports_to_s3(
@@ -274,6 +318,14 @@ This is an automated fallback message when AI investigation fails.
         
         logger.debug("Notification sent successfully")
         
+        tokens_used = investigation_result.get('tokens_used', 0) if isinstance(investigation_result, dict) else 0
+        emf_emit(METRICS_NAMESPACE, {
+            'InvestigationDuration': (int((time.time() - start_time) * 1000), 'Milliseconds'),
+            'BedrockTokensUsed': (tokens_used, 'Count'),
+            'ToolExecutionCount': (tool_calls_count, 'Count'),
+            'InvestigationSuccess': (1 if investigation_succeeded else 0, 'Count')
+        })
+        
         response_body = {
             'alarm': alarm_name,
             'state': alarm_state,
@@ -322,6 +374,11 @@ Please check the Lambda logs for more information.
         except Exception as sns_error:
             logger.error(f"Failed to send error notification: {str(sns_error)}")
         
+        emf_emit(METRICS_NAMESPACE, {
+            'InvestigationDuration': (int((time.time() - start_time) * 1000), 'Milliseconds'),
+            'InvestigationSuccess': (0, 'Count')
+        })
+        
         return {
             'statusCode': 500,
             'body': json.dumps({
@@ -1,11 +1,26 @@
+import copy
+import functools
 import pytest
 import sys
-import os
-from unittest.mock import Mock, MagicMock
+import pathlib
+from collections import Counter
+from types import SimpleNamespace
+from unittest.mock import Mock, MagicMock, patch
 
-# Add parent directories to path for imports
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../lambda')))
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../tool-lambda')))
+# Make the Lambda sources importable once for the whole session; test modules
+# must not touch sys.path themselves. tool-lambda stays ahead of lambda, as it
+# was with the old per-directory insert(0, ...) calls.
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path[:0] = [
+    source_path
+    for source_path in (str(ROOT / "tool-lambda"), str(ROOT / "lambda"))
+    if source_path not in sys.path
+]
+
+def pytest_configure(config):
+    """Register custom markers so runs without pytest-xdist stay warning-free."""
+    config.addinivalue_line("markers", "xdist_group(name): run all tests in the group on the same xdist worker")
+    config.addinivalue_line("markers", "slow: large-payload tests; deselect with -m \"not slow\" for fast feedback")
 
 @pytest.fixture
 def mock_boto3_client():
@@ -13,43 +28,176 @@ def mock_boto3_client():
     mock_client = MagicMock()
     return mock_client
 
-@pytest.fixture
-def sample_alarm_event():
-    """Sample CloudWatch Alarm event for testing."""
+# Session-scoped fixtures below exist once per pytest-xdist worker. Tests must
+# leave them (and any module-level state) as they found them so `pytest -n auto`
+# can run any test on any worker; only tests that genuinely share state get an
+# xdist_group marker.
+@pytest.fixture(scope="session")
+def fake_aws_clients():
+    """Pre-built fake boto3 clients keyed by service name, shared by the session."""
     return {
-        "source": "aws.cloudwatch",
-        "accountId": "123456789012",
-        "time": "2025-08-06T12:00:00Z",
-        "region": "us-east-2",
-        "alarmData": {
-            "alarmName": "test-lambda-errors",
-            "state": {
-                "value": "ALARM",
-                "reason": "Threshold Crossed: 5 datapoints were greater than the threshold (1.0)",
-                "reasonData": "{\"version\":\"1.0\",\"queryDate\":\"2025-08-06T12:00:00.000+0000\"}"
-            },
-            "previousState": {
-                "value": "OK",
-                "reason": "Threshold Crossed: 1 datapoint was not greater than the threshold (1.0)"
-            },
-            "configuration": {
-                "metrics": [{
-                    "id": "m1",
-                    "metricStat": {
-                        "metric": {
-                            "namespace": "AWS/Lambda",
-                            "name": "Errors",
-                            "dimensions": {
-                                "FunctionName": "test-function"
-                            }
-                        },
-                        "period": 60,
-                        "stat": "Sum"
-                    }
-                }]
-            }
+        service: Mock(name=service)
+        for service in ("bedrock-runtime", "lambda", "sns", "s3", "cloudwatch", "dynamodb")
+    }
+
+@pytest.fixture
+def boto3_calls():
+    """Counter of boto3 client/resource constructions by service name."""
+    return Counter()
+
+@pytest.fixture
+def patched_boto3(fake_aws_clients, boto3_calls):
+    """Route boto3.client/boto3.resource to the shared fakes for one test.
+
+    Every module under test calls boto3 through the module attribute, so a
+    single patch covers both Lambdas. Each construction is tallied in
+    boto3_calls. Fakes are reset on teardown so nothing configured in one
+    test leaks into the next.
+    """
+    def fake_for(service, **_):
+        boto3_calls[service] += 1
+        return fake_aws_clients[service]
+
+    with patch("boto3.client", side_effect=fake_for), patch("boto3.resource", side_effect=fake_for):
+        yield fake_aws_clients
+    for client in fake_aws_clients.values():
+        client.reset_mock(return_value=True, side_effect=True)
+
+def _client_factory(services):
+    """boto3.client side_effect routing service names to pre-built mocks."""
+    return lambda service_name, **_: services.get(service_name) or Mock()
+
+@pytest.fixture(scope="session")
+def client_factory():
+    """Build a boto3.client side_effect from a {service name: mock} dict.
+
+    Unknown services get a fresh Mock, as the hand-written factories did.
+    """
+    return _client_factory
+
+@pytest.fixture(scope="module")
+def bedrock_client_factory(fake_aws_clients):
+    """Build each BedrockAgentClient once per module, wired to the shared fakes.
+
+    The fakes are the same objects patched_boto3 hands out, so a cached client
+    sees whatever a test configures on them.
+    """
+    from bedrock_client import BedrockAgentClient
+
+    @functools.lru_cache(maxsize=None)
+    def build(model_id, tool_lambda_arn):
+        with patch("boto3.client", side_effect=lambda service, **_: fake_aws_clients[service]):
+            return BedrockAgentClient(model_id, tool_lambda_arn)
+    yield build
+    build.cache_clear()
+
+@pytest.fixture(scope="module")
+def bedrock_client(bedrock_client_factory):
+    """The ('test-model', 'test-arn') client most Bedrock tests use.
+
+    Pair it with patched_boto3 and configure patched_boto3['bedrock-runtime']
+    per test; the fakes are reset between tests.
+    """
+    return bedrock_client_factory('test-model', 'test-arn')
+
+@pytest.fixture
+def patched_aws(monkeypatch, patched_boto3):
+    """Everything triage_handler needs to run, installed once for the test.
+
+    Sets the handler's environment, routes boto3 to the shared fakes and
+    swaps in a mock BedrockAgentClient. The patches are process-wide, so
+    worker threads can call the handler directly without patching again.
+    Returns (mock BedrockAgentClient class, fake clients by service).
+    """
+    for name, value in (
+        ('BEDROCK_MODEL_ID', 'test-model'),
+        ('TOOL_LAMBDA_ARN', 'test-arn'),
+        ('SNS_TOPIC_ARN', 'test-topic'),
+        ('DYNAMODB_TABLE', 'test-table'),
+    ):
+        monkeypatch.setenv(name, value)
+    mock_bedrock = Mock()
+    monkeypatch.setattr('triage_handler.BedrockAgentClient', mock_bedrock)
+    return mock_bedrock, patched_boto3
+
+class _FrozenDict(dict):
+    """dict that refuses in-place mutation but still serializes with json.dumps.
+
+    MappingProxyType would be the obvious choice, but the handlers json.dumps
+    the event. .copy() and copy.deepcopy() hand back ordinary mutable dicts.
+    """
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("shared session fixture; copy it before mutating")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __deepcopy__(self, memo):
+        return {key: copy.deepcopy(value, memo) for key, value in self.items()}
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return _FrozenDict((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+_SAMPLE_ALARM_EVENT = _freeze({
+    "source": "aws.cloudwatch",
+    "accountId": "123456789012",
+    "time": "2025-08-06T12:00:00Z",
+    "region": "us-east-2",
+    "alarmData": {
+        "alarmName": "test-lambda-errors",
+        "state": {
+            "value": "ALARM",
+            "reason": "Threshold Crossed: 5 datapoints were greater than the threshold (1.0)",
+            "reasonData": "{\"version\":\"1.0\",\"queryDate\":\"2025-08-06T12:00:00.000+0000\"}"
+        },
+        "previousState": {
+            "value": "OK",
+            "reason": "Threshold Crossed: 1 datapoint was not greater than the threshold (1.0)"
+        },
+        "configuration": {
+            "metrics": [{
+                "id": "m1",
+                "metricStat": {
+                    "metric": {
+                        "namespace": "AWS/Lambda",
+                        "name": "Errors",
+                        "dimensions": {
+                            "FunctionName": "test-function"
+                        }
+                    },
+                    "period": 60,
+                    "stat": "Sum"
+                }
+            }]
         }
     }
+})
+
+_LAMBDA_CONTEXT = SimpleNamespace(
+    function_name='test-function',
+    function_version='$LATEST',
+    invoked_function_arn='arn:aws:lambda:us-east-2:123456789012:function:test-function',
+    memory_limit_in_mb='1024',
+    aws_request_id='test-request-id',
+    log_group_name='/aws/lambda/test-function',
+    log_stream_name='2025/08/06/[$LATEST]test-stream',
+    get_remaining_time_in_millis=lambda: 300000
+)
+
+@pytest.fixture(scope="session")
+def sample_alarm_event():
+    """Sample CloudWatch Alarm event for testing (read-only, shared by the session)."""
+    return _SAMPLE_ALARM_EVENT
+
+@pytest.fixture(scope="session")
+def investigation_prompt(sample_alarm_event):
+    """Investigation prompt for the sample alarm, rendered once per session."""
+    from prompt_template import PromptTemplate
+    return PromptTemplate.generate_investigation_prompt(sample_alarm_event)
 
 @pytest.fixture
 def mock_environment():
@@ -62,16 +210,38 @@ def mock_environment():
     }
     return env
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_lambda_context():
-    """Mock Lambda context object."""
-    context = Mock()
-    context.function_name = 'test-function'
-    context.function_version = '$LATEST'
-    context.invoked_function_arn = 'arn:aws:lambda:us-east-2:123456789012:function:test-function'
-    context.memory_limit_in_mb = '1024'
-    context.aws_request_id = 'test-request-id'
-    context.log_group_name = '/aws/lambda/test-function'
-    context.log_stream_name = '2025/08/06/[$LATEST]test-stream'
-    context.get_remaining_time_in_millis = Mock(return_value=300000)
-    return context
\ No newline at end of file
+    """Lambda context stand-in, shared by the session."""
+    return _LAMBDA_CONTEXT
+
+@pytest.fixture
+def large_alarm_event():
+    """Oversized alarm event used to simulate memory pressure."""
+    return {
+        'alarmData': {
+            'alarmName': 'memory-intensive-alarm',
+            'state': {'value': 'ALARM'},
+            'configuration': {
+                'metrics': [
+                    {
+                        'name': f'MetricName{i}',
+                        'dimensions': {f'Dimension{j}': f'Value{j}' for j in range(50)},
+                        'statistics': ['Average', 'Maximum', 'Minimum', 'Sum', 'SampleCount']
+                    }
+                    for i in range(100)  # Large number of metrics
+                ],
+                'metadata': {
+                    'large_data': ['x' * 1000 for _ in range(100)],  # Large data structure
+                    'nested_objects': {
+                        f'level_{i}': {
+                            f'sublevel_{j}': f'data_{k}' * 100
+                            for j in range(10)
+                            for k in range(10)
+                        }
+                        for i in range(10)
+                    }
+                }
+            }
+        }
+    }
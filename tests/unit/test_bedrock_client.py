@@ -1,13 +1,21 @@
-import pytest
 import json
-from unittest.mock import Mock, patch, MagicMock, call
-import sys
-import os
-
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../lambda')))
+import pytest
+from unittest.mock import Mock, patch
 
 from bedrock_client import BedrockAgentClient
 
+def lambda_payload(status_code, body_as_string=True, **body):
+    """Tool Lambda invoke Payload, encoded once rather than on every read().
+
+    By default the body stays a JSON string, the shape older tool Lambda
+    builds return; pass body_as_string=False for the current dict body.
+    """
+    data = json.dumps({
+        'statusCode': status_code,
+        'body': json.dumps(body) if body_as_string else body
+    }).encode()
+    return Mock(read=Mock(return_value=data))
+
 class TestBedrockAgentClient:
     
     def test_initialization(self):
@@ -68,13 +76,7 @@ class TestBedrockAgentClient:
         # Mock Lambda tool response
         mock_lambda.invoke.return_value = {
             'StatusCode': 200,
-            'Payload': Mock(read=lambda: json.dumps({
-                'statusCode': 200,
-                'body': json.dumps({
-                    'success': True,
-                    'output': 'EC2 instances listed'
-                })
-            }).encode())
+            'Payload': lambda_payload(200, success=True, output='EC2 instances listed')
         }
         
         # Create client and run investigation
@@ -89,6 +91,42 @@ class TestBedrockAgentClient:
         assert mock_bedrock.converse.call_count == 2
         assert mock_lambda.invoke.call_count == 1
     
+    @pytest.mark.parametrize("body_as_string", [
+        pytest.param(False, id="dict-body"),
+        pytest.param(True, id="legacy-string-body"),
+    ])
+    @patch('bedrock_client.boto3.client')
+    @patch('bedrock_client.time.sleep')
+    def test_investigate_reads_tool_lambda_body(self, mock_sleep, mock_boto3, body_as_string):
+        """Test the tool output reaches tool_calls and the conversation for both body shapes."""
+        mock_bedrock = Mock()
+        mock_lambda = Mock()
+        mock_boto3.side_effect = [mock_bedrock, mock_lambda]
+        
+        mock_bedrock.converse.side_effect = [
+            {'output': {'message': {'content': [{
+                'text': 'TOOL: python_executor\n```python\nresult = "ok"\n```'
+            }]}}},
+            {'output': {'message': {'content': [{'text': 'Investigation complete.'}]}}}
+        ]
+        mock_lambda.invoke.return_value = {
+            'StatusCode': 200,
+            'Payload': lambda_payload(200, body_as_string, success=True, output='3 instances running')
+        }
+        
+        client = BedrockAgentClient('test-model', 'test-arn')
+        result = client.investigate_with_tools("Test prompt")
+        
+        assert result['success'] is True
+        assert result['tool_calls'][0]['output'] == '3 instances running'
+        
+        # The second Converse call sees the tool result as the latest user turn
+        messages = mock_bedrock.converse.call_args_list[1].kwargs['messages']
+        tool_turn = [m for m in messages if m['role'] == 'user'][-1]
+        assert tool_turn['content'][0]['text'] == (
+            "Tool execution result:\nSuccess: True\nOutput:\n3 instances running"
+        )
+    
     @patch('bedrock_client.boto3.client')
     @patch('bedrock_client.time.sleep')
     def test_investigate_with_multiple_tools(self, mock_sleep, mock_boto3):
@@ -135,23 +173,11 @@ class TestBedrockAgentClient:
         mock_lambda.invoke.side_effect = [
             {
                 'StatusCode': 200,
-                'Payload': Mock(read=lambda: json.dumps({
-                    'statusCode': 200,
-                    'body': json.dumps({
-                        'success': True,
-                        'output': 'EC2 instances: i-123456'
-                    })
-                }).encode())
+                'Payload': lambda_payload(200, success=True, output='EC2 instances: i-123456')
             },
             {
                 'StatusCode': 200,
-                'Payload': Mock(read=lambda: json.dumps({
-                    'statusCode': 200,
-                    'body': json.dumps({
-                        'success': True,
-                        'output': 'Alarms found: CPUAlarm'
-                    })
-                }).encode())
+                'Payload': lambda_payload(200, success=True, output='Alarms found: CPUAlarm')
             }
         ]
         
@@ -203,13 +229,7 @@ class TestBedrockAgentClient:
         # Mock Lambda tool error
         mock_lambda.invoke.return_value = {
             'StatusCode': 500,
-            'Payload': Mock(read=lambda: json.dumps({
-                'statusCode': 500,
-                'body': json.dumps({
-                    'success': False,
-                    'output': 'Internal server error'
-                })
-            }).encode())
+            'Payload': lambda_payload(500, success=False, output='Internal server error')
         }
         
         # Create client and run investigation
@@ -269,13 +289,7 @@ class TestBedrockAgentClient:
         # Mock Lambda tool response
         mock_lambda.invoke.return_value = {
             'StatusCode': 200,
-            'Payload': Mock(read=lambda: json.dumps({
-                'statusCode': 200,
-                'body': json.dumps({
-                    'success': True,
-                    'output': 'Iteration output'
-                })
-            }).encode())
+            'Payload': lambda_payload(200, success=True, output='Iteration output')
         }
         
         # Create client and run investigation
@@ -403,17 +417,7 @@ class TestBedrockAgentClient:
         # Mock successful Lambda execution
         mock_lambda.invoke.return_value = {
             'StatusCode': 200,
-            'Payload': Mock(read=lambda: json.dumps({
-                'statusCode': 200,
-                'body': json.dumps({
-                    'success': True,
-                    'output': 'Alarm configuration retrieved',
-                    'result': '{"AlarmName": "test-alarm"}',
-                    'stdout': '',
-                    'stderr': '',
-                    'execution_time': 0.5
-                })
-            }).encode())
+            'Payload': lambda_payload(200, success=True, output='Alarm configuration retrieved', result='{"AlarmName": "test-alarm"}', stdout='', stderr='', execution_time=0.5)
         }
 
         # Create client and run investigation
@@ -1,10 +1,5 @@
-import pytest
 import json
 from unittest.mock import Mock, patch
-import sys
-import os
-
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../lambda')))
 
 from bedrock_client import BedrockAgentClient
 
@@ -13,15 +8,15 @@ class TestBedrockClientEdgeCases:
     
     @patch('bedrock_client.boto3.client')
     @patch('bedrock_client.time.sleep')
-    def test_tool_execution_with_complex_error_response(self, mock_sleep, mock_boto3_client):
+    def test_tool_execution_with_complex_error_response(self, mock_sleep, mock_boto3_client, client_factory):
         """Test tool execution when Lambda returns complex error structure."""
         mock_bedrock_client = Mock()
         mock_lambda_client = Mock()
         
-        mock_boto3_client.side_effect = lambda service_name, **kwargs: {
+        mock_boto3_client.side_effect = client_factory({
             'bedrock-runtime': mock_bedrock_client,
             'lambda': mock_lambda_client
-        }.get(service_name, Mock())
+        })
         
         # Mock Bedrock requesting tool with Converse API format
         bedrock_response = {
@@ -64,15 +59,15 @@ class TestBedrockClientEdgeCases:
     
     @patch('bedrock_client.boto3.client')
     @patch('bedrock_client.time.sleep')
-    def test_tool_execution_lambda_timeout_scenario(self, mock_sleep, mock_boto3_client):
+    def test_tool_execution_lambda_timeout_scenario(self, mock_sleep, mock_boto3_client, client_factory):
         """Test tool execution when Lambda times out."""
         mock_bedrock_client = Mock()
         mock_lambda_client = Mock()
         
-        mock_boto3_client.side_effect = lambda service_name, **kwargs: {
+        mock_boto3_client.side_effect = client_factory({
             'bedrock-runtime': mock_bedrock_client,
             'lambda': mock_lambda_client
-        }.get(service_name, Mock())
+        })
         
         # Mock Bedrock requesting tool then final response with Converse API
         bedrock_responses = [
@@ -114,15 +109,15 @@ class TestBedrockClientEdgeCases:
     
     @patch('bedrock_client.boto3.client')
     @patch('bedrock_client.time.sleep')
-    def test_bedrock_response_parsing_edge_cases(self, mock_sleep, mock_boto3_client):
+    def test_bedrock_response_parsing_edge_cases(self, mock_sleep, mock_boto3_client, client_factory):
         """Test parsing of various Bedrock response formats."""
         mock_bedrock_client = Mock()
         mock_lambda_client = Mock()
         
-        mock_boto3_client.side_effect = lambda service_name, **kwargs: {
+        mock_boto3_client.side_effect = client_factory({
             'bedrock-runtime': mock_bedrock_client,
             'lambda': mock_lambda_client
-        }.get(service_name, Mock())
+        })
         
         # Test exception from Converse API (simulating malformed response)
         mock_bedrock_client.converse.side_effect = json.JSONDecodeError("Expecting value", "doc", 0)
@@ -1,10 +1,5 @@
-import pytest
 import json
-from unittest.mock import Mock, patch, call
-import sys
-import os
-
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../lambda')))
+from unittest.mock import Mock, patch
 
 from bedrock_client import BedrockAgentClient
 
@@ -13,15 +8,15 @@ class TestComplexInteractions:
     
     @patch('bedrock_client.boto3.client')
     @patch('bedrock_client.time.sleep')  # Speed up retry tests
-    def test_claude_multi_tool_investigation_with_partial_failures(self, mock_sleep, mock_boto3_client):
+    def test_claude_multi_tool_investigation_with_partial_failures(self, mock_sleep, mock_boto3_client, client_factory):
         """Test Claude investigation with multiple tool calls where some fail."""
         mock_bedrock_client = Mock()
         mock_lambda_client = Mock()
         
-        mock_boto3_client.side_effect = lambda service_name, **kwargs: {
+        mock_boto3_client.side_effect = client_factory({
             'bedrock-runtime': mock_bedrock_client,
             'lambda': mock_lambda_client
-        }.get(service_name, Mock())
+        })
         
         # Mock complex conversation: tool -> partial failure -> retry -> success
         bedrock_responses = [
@@ -111,15 +106,15 @@ class TestComplexInteractions:
         assert mock_bedrock_client.converse.call_count == 4
     
     @patch('bedrock_client.boto3.client')
-    def test_claude_iterative_investigation_strategy(self, mock_boto3_client):
+    def test_claude_iterative_investigation_strategy(self, mock_boto3_client, client_factory):
         """Test Claude building investigation iteratively based on previous results."""
         mock_bedrock_client = Mock()
         mock_lambda_client = Mock()
         
-        mock_boto3_client.side_effect = lambda service_name, **kwargs: {
+        mock_boto3_client.side_effect = client_factory({
             'bedrock-runtime': mock_bedrock_client,
             'lambda': mock_lambda_client
-        }.get(service_name, Mock())
+        })
         
         # Mock iterative investigation pattern
         bedrock_responses = [
@@ -198,15 +193,15 @@ class TestComplexInteractions:
     
     @patch('bedrock_client.boto3.client')
     @patch('time.sleep')  # Mock sleep to speed up test
-    def test_claude_max_iterations_with_persistent_tool_calls(self, mock_sleep, mock_boto3_client):
+    def test_claude_max_iterations_with_persistent_tool_calls(self, mock_sleep, mock_boto3_client, client_factory):
         """Test Claude handles persistent tool calls correctly."""
         mock_bedrock_client = Mock()
         mock_lambda_client = Mock()
         
-        mock_boto3_client.side_effect = lambda service_name, **kwargs: {
+        mock_boto3_client.side_effect = client_factory({
             'bedrock-runtime': mock_bedrock_client,
             'lambda': mock_lambda_client
-        }.get(service_name, Mock())
+        })
         
         # Test with smaller number for speed - create 7 tool responses
         responses = []
@@ -1,11 +1,7 @@
-import pytest
 import json
 from unittest.mock import Mock, patch
-import sys
 import os
 
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../lambda')))
-
 from triage_handler import handler as triage_handler, format_notification
 from prompt_template import PromptTemplate
 
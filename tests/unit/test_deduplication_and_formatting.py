@@ -1,15 +1,22 @@
-import pytest
-import json
-from unittest.mock import Mock, patch, MagicMock
-import sys
+from unittest.mock import Mock, patch
 import os
 from datetime import datetime, timedelta
-from decimal import Decimal
 
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../lambda')))
+from botocore.exceptions import ClientError
 
 from triage_handler import should_investigate, format_notification
 
+def already_investigated(timestamp):
+    """ConditionalCheckFailedException carrying the existing item, as DynamoDB
+    returns it with ReturnValuesOnConditionCheckFailure='ALL_OLD'."""
+    return ClientError(
+        {
+            'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'The conditional request failed'},
+            'Item': {'alarm_name': {'S': 'test-alarm'}, 'timestamp': {'N': str(timestamp)}}
+        },
+        'PutItem'
+    )
+
 class TestDeduplicationAndFormatting:
     """Test DynamoDB deduplication logic and notification formatting."""
     
@@ -19,8 +26,7 @@ class TestDeduplicationAndFormatting:
         """Test that first alarm occurrence triggers investigation."""
         # Mock DynamoDB table with no previous investigation
         mock_table = Mock()
-        mock_table.get_item.return_value = {}  # No item found
-        mock_table.put_item.return_value = {}
+        mock_table.put_item.return_value = {}  # Condition passes, item written
         
         mock_dynamodb = Mock()
         mock_dynamodb.Table.return_value = mock_table
@@ -31,8 +37,11 @@ class TestDeduplicationAndFormatting:
         
         assert result is True
         assert time_since == 0
-        mock_table.get_item.assert_called_once_with(Key={'alarm_name': 'test-alarm'})
+        mock_table.get_item.assert_not_called()
         mock_table.put_item.assert_called_once()
+        put_kwargs = mock_table.put_item.call_args[1]
+        assert put_kwargs['ConditionExpression'] == 'attribute_not_exists(alarm_name) OR #ts < :window_start'
+        assert put_kwargs['ExpressionAttributeNames'] == {'#ts': 'timestamp'}
     
     @patch.dict(os.environ, {'DYNAMODB_TABLE': 'test-table'})
     @patch('triage_handler.boto3.resource')
@@ -41,12 +50,7 @@ class TestDeduplicationAndFormatting:
         # Mock DynamoDB table with recent investigation
         mock_table = Mock()
         recent_time = int((datetime.now() - timedelta(minutes=30)).timestamp())
-        mock_table.get_item.return_value = {
-            'Item': {
-                'alarm_name': 'test-alarm',
-                'timestamp': Decimal(str(recent_time))  # Changed from 'last_investigated' to 'timestamp'
-            }
-        }
+        mock_table.put_item.side_effect = already_investigated(recent_time)
         
         mock_dynamodb = Mock()
         mock_dynamodb.Table.return_value = mock_table
@@ -56,23 +60,16 @@ class TestDeduplicationAndFormatting:
         result, time_since = should_investigate('test-alarm', investigation_window_hours=1)
         
         assert result is False
-        assert time_since > 0  # Should have time since last investigation
-        mock_table.get_item.assert_called_once_with(Key={'alarm_name': 'test-alarm'})
-        mock_table.put_item.assert_not_called()
+        assert abs(time_since - 1800) < 60  # Should have time since last investigation
+        mock_table.get_item.assert_not_called()
+        mock_table.put_item.assert_called_once()
     
     @patch.dict(os.environ, {'DYNAMODB_TABLE': 'test-table'})
     @patch('triage_handler.boto3.resource')
     def test_should_investigate_after_window_expired(self, mock_boto3_resource):
         """Test that alarms after deduplication window trigger new investigation."""
-        # Mock DynamoDB table with old investigation
+        # Old investigation not yet swept by TTL: the condition lets it be overwritten
         mock_table = Mock()
-        old_time = int((datetime.now() - timedelta(hours=2)).timestamp())
-        mock_table.get_item.return_value = {
-            'Item': {
-                'alarm_name': 'test-alarm',
-                'timestamp': Decimal(str(old_time))  # Changed from 'last_investigated' to 'timestamp'
-            }
-        }
         mock_table.put_item.return_value = {}
         
         mock_dynamodb = Mock()
@@ -84,8 +81,13 @@ class TestDeduplicationAndFormatting:
         
         assert result is True
         assert time_since == 0  # New investigation
-        mock_table.get_item.assert_called_once_with(Key={'alarm_name': 'test-alarm'})
+        mock_table.get_item.assert_not_called()
         mock_table.put_item.assert_called_once()
+        
+        # Only entries written within the last hour block the write
+        window_start = mock_table.put_item.call_args[1]['ExpressionAttributeValues'][':window_start']
+        expected_start = (datetime.now() - timedelta(hours=1)).timestamp()
+        assert abs(float(window_start) - expected_start) < 60
     
     @patch.dict(os.environ, {'DYNAMODB_TABLE': 'test-table'})
     @patch('triage_handler.boto3.resource')
@@ -93,7 +95,7 @@ class TestDeduplicationAndFormatting:
         """Test that DynamoDB errors don't block investigation."""
         # Mock DynamoDB table that throws error
         mock_table = Mock()
-        mock_table.get_item.side_effect = Exception("DynamoDB unavailable")
+        mock_table.put_item.side_effect = Exception("DynamoDB unavailable")
         
         mock_dynamodb = Mock()
         mock_dynamodb.Table.return_value = mock_table
@@ -111,13 +113,6 @@ class TestDeduplicationAndFormatting:
         """Test custom investigation window configuration."""
         # Mock DynamoDB table with investigation just outside custom window
         mock_table = Mock()
-        edge_time = int((datetime.now() - timedelta(hours=3, minutes=1)).timestamp())
-        mock_table.get_item.return_value = {
-            'Item': {
-                'alarm_name': 'test-alarm',
-                'timestamp': Decimal(str(edge_time))  # Changed from 'last_investigated' to 'timestamp'
-            }
-        }
         mock_table.put_item.return_value = {}
         
         mock_dynamodb = Mock()
@@ -129,14 +124,19 @@ class TestDeduplicationAndFormatting:
         
         assert result is True
         assert time_since == 0
+        
+        # An investigation from 3h01m ago falls before the window start
+        edge_time = (datetime.now() - timedelta(hours=3, minutes=1)).timestamp()
+        window_start = mock_table.put_item.call_args[1]['ExpressionAttributeValues'][':window_start']
+        assert edge_time < float(window_start)
+        assert abs(float(window_start) - (datetime.now() - timedelta(hours=3)).timestamp()) < 60
     
     @patch.dict(os.environ, {'DYNAMODB_TABLE': 'test-table'})
     @patch('triage_handler.boto3.resource')
     def test_should_investigate_ttl_expiry(self, mock_boto3_resource):
         """Test TTL field is set correctly for automatic cleanup."""
         mock_table = Mock()
-        mock_table.get_item.return_value = {}  # No previous investigation
-        mock_table.put_item.return_value = {}
+        mock_table.put_item.return_value = {}  # No previous investigation
         
         mock_dynamodb = Mock()
         mock_dynamodb.Table.return_value = mock_table
@@ -348,14 +348,12 @@ JSON: {"key": "value", "number": 123}"""
         # Mock DynamoDB table for concurrent access
         mock_table = Mock()
         
-        # First call returns no item, second call returns item (simulating race)
-        mock_table.get_item.side_effect = [
-            {},  # First check - no item
-            {'Item': {'alarm_name': 'test-alarm', 'timestamp': Decimal(str(int(datetime.now().timestamp())))}}  # Second check - item exists
+        # First write succeeds, second fails its condition (simulating race)
+        mock_table.put_item.side_effect = [
+            {},  # First write - no item
+            already_investigated(int(datetime.now().timestamp()) - 5)  # Second write - item exists
         ]
         
-        mock_table.put_item.return_value = {}
-        
         mock_dynamodb = Mock()
         mock_dynamodb.Table.return_value = mock_table
         mock_boto3_resource.return_value = mock_dynamodb
@@ -1,13 +1,8 @@
-import pytest
 import json
-from unittest.mock import Mock, patch, MagicMock
-import sys
+from unittest.mock import Mock, patch
 import os
-from datetime import datetime
 import time
 
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../lambda')))
-
 from triage_handler import save_enhanced_reports_to_s3, handler
 from bedrock_client import BedrockAgentClient
 
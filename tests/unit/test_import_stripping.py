@@ -1,12 +1,6 @@
 """
 Test import statement stripping functionality in tool_handler.
 """
-import pytest
-import json
-import sys
-import os
-
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../tool-lambda')))
 
 from tool_handler import remove_imports, execute_python_code, handler
 
@@ -114,7 +108,7 @@ result = json.dumps(identity)
         response = handler(event, mock_lambda_context)
         
         assert response['statusCode'] == 200
-        body = json.loads(response['body'])
+        body = response['body']
         assert body['success'] is True
         
         # Check that import removal was noted
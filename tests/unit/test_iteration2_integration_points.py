@@ -2,20 +2,11 @@
 Testing Iteration 2: Address top 3 remaining gaps after Iteration 1
 Focus: Integration points, mocked service behaviors, and boundary conditions
 """
-import pytest
 import json
-import sys
-import os
-from unittest.mock import Mock, patch, MagicMock, call
-import boto3
-from botocore.exceptions import ClientError, BotoCoreError
-import time
+from unittest.mock import Mock, patch, MagicMock
+from botocore.exceptions import ClientError
 
-# Add module paths
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../lambda')))
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../tool-lambda')))
-
-from triage_handler import handler as triage_handler, format_notification
+from triage_handler import handler as triage_handler
 from bedrock_client import BedrockAgentClient
 from prompt_template import PromptTemplate
 from tool_handler import handler as tool_handler
@@ -246,7 +237,7 @@ class TestIteration2IntegrationPoints:
                     result = tool_handler(event, {})
                     
                     assert result['statusCode'] == 200
-                    body = json.loads(result['body'])
+                    body = result['body']
                     assert body['success'] is True
                     assert expected_region in body['output']
     
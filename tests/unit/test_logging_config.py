@@ -1,13 +1,17 @@
 import pytest
 import logging
-from unittest.mock import Mock, patch
-import sys
-import os
-
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../lambda')))
 
 from logging_config import configure_logging, get_logger
 
+# These tests mutate the process-global root logger, so keep them on one xdist worker
+pytestmark = pytest.mark.xdist_group("logging")
+
+@pytest.fixture
+def configured_logger(request, monkeypatch):
+    """Root logger configured for the LOG_LEVEL given as the fixture param."""
+    monkeypatch.setenv('LOG_LEVEL', request.param)
+    return configure_logging()
+
 class TestLoggingConfiguration:
     """Test logging configuration with different log levels."""
     
@@ -18,9 +22,9 @@ class TestLoggingConfiguration:
         root_logger.setLevel(logging.WARNING)
         root_logger.handlers = []
     
-    @patch.dict(os.environ, {'LOG_LEVEL': 'ERROR'})
-    def test_configure_logging_error_level(self):
+    def test_configure_logging_error_level(self, monkeypatch):
         """Test that ERROR log level only logs errors."""
+        monkeypatch.setenv('LOG_LEVEL', 'ERROR')
         logger = configure_logging()
         
         assert logger.level == logging.ERROR
@@ -28,9 +32,9 @@ class TestLoggingConfiguration:
         assert not logger.isEnabledFor(logging.INFO)
         assert not logger.isEnabledFor(logging.DEBUG)
     
-    @patch.dict(os.environ, {'LOG_LEVEL': 'INFO'})
-    def test_configure_logging_info_level(self):
+    def test_configure_logging_info_level(self, monkeypatch):
         """Test that INFO log level logs info and errors."""
+        monkeypatch.setenv('LOG_LEVEL', 'INFO')
         logger = configure_logging()
         
         assert logger.level == logging.INFO
@@ -38,9 +42,9 @@ class TestLoggingConfiguration:
         assert logger.isEnabledFor(logging.INFO)
         assert not logger.isEnabledFor(logging.DEBUG)
     
-    @patch.dict(os.environ, {'LOG_LEVEL': 'DEBUG'})
-    def test_configure_logging_debug_level(self):
+    def test_configure_logging_debug_level(self, monkeypatch):
         """Test that DEBUG log level logs everything."""
+        monkeypatch.setenv('LOG_LEVEL', 'DEBUG')
         logger = configure_logging()
         
         assert logger.level == logging.DEBUG
@@ -48,23 +52,23 @@ class TestLoggingConfiguration:
         assert logger.isEnabledFor(logging.INFO)
         assert logger.isEnabledFor(logging.DEBUG)
     
-    @patch.dict(os.environ, {}, clear=True)
-    def test_configure_logging_default_level(self):
+    def test_configure_logging_default_level(self, monkeypatch):
         """Test that default log level is INFO when not specified."""
+        monkeypatch.delenv('LOG_LEVEL', raising=False)
         logger = configure_logging()
         
         assert logger.level == logging.INFO
     
-    @patch.dict(os.environ, {'LOG_LEVEL': 'INVALID'})
-    def test_configure_logging_invalid_level(self):
+    def test_configure_logging_invalid_level(self, monkeypatch):
         """Test that invalid log level defaults to INFO."""
+        monkeypatch.setenv('LOG_LEVEL', 'INVALID')
         logger = configure_logging()
         
         assert logger.level == logging.INFO
     
-    @patch.dict(os.environ, {'LOG_LEVEL': 'info'})
-    def test_configure_logging_case_insensitive(self):
+    def test_configure_logging_case_insensitive(self, monkeypatch):
         """Test that log level is case insensitive."""
+        monkeypatch.setenv('LOG_LEVEL', 'info')
         logger = configure_logging()
         
         assert logger.level == logging.INFO
@@ -81,53 +85,21 @@ class TestLoggingConfiguration:
         
         assert logger.name == 'root'
     
-    @patch.dict(os.environ, {'LOG_LEVEL': 'ERROR'})
-    def test_logging_output_error_level(self, caplog):
-        """Test that only errors are logged at ERROR level."""
-        logger = configure_logging()
-        
-        # Set caplog to ERROR level to match logger config
-        with caplog.at_level(logging.ERROR):
-            logger.debug("Debug message")
-            logger.info("Info message")
-            logger.error("Error message")
-        
-        # Only error message should be captured
-        assert len(caplog.records) == 1
-        assert caplog.records[0].levelname == 'ERROR'
-        assert "Error message" in caplog.records[0].message
-    
-    @patch.dict(os.environ, {'LOG_LEVEL': 'INFO'})
-    def test_logging_output_info_level(self, caplog):
-        """Test that info and errors are logged at INFO level."""
-        logger = configure_logging()
-        
-        # Set caplog to INFO level to match logger config
-        with caplog.at_level(logging.INFO):
-            logger.debug("Debug message")
-            logger.info("Info message")
-            logger.error("Error message")
-        
-        # Info and error messages should be captured
-        assert len(caplog.records) == 2
-        assert caplog.records[0].levelname == 'INFO'
-        assert caplog.records[1].levelname == 'ERROR'
-    
-    @patch.dict(os.environ, {'LOG_LEVEL': 'DEBUG'})
-    def test_logging_output_debug_level(self, caplog):
-        """Test that all messages are logged at DEBUG level."""
-        logger = configure_logging()
-        
-        with caplog.at_level(logging.DEBUG):
-            logger.debug("Debug message")
-            logger.info("Info message")
-            logger.error("Error message")
-        
-        # All messages should be captured
-        assert len(caplog.records) == 3
-        assert caplog.records[0].levelname == 'DEBUG'
-        assert caplog.records[1].levelname == 'INFO'
-        assert caplog.records[2].levelname == 'ERROR'
+    @pytest.mark.parametrize('configured_logger, expected_levels', [
+        ('ERROR', ['ERROR']),
+        ('INFO', ['INFO', 'ERROR']),
+        ('DEBUG', ['DEBUG', 'INFO', 'ERROR']),
+    ], indirect=['configured_logger'])
+    def test_logging_output_level(self, configured_logger, expected_levels, caplog):
+        """Test that only messages at or above the configured level are logged."""
+        # Set caplog to the same level as the logger config
+        with caplog.at_level(configured_logger.level):
+            configured_logger.debug("Debug message")
+            configured_logger.info("Info message")
+            configured_logger.error("Error message")
+        
+        assert [record.levelname for record in caplog.records] == expected_levels
+        assert "Error message" in caplog.records[-1].message
     
     def test_handler_configuration(self):
         """Test that handler is configured properly."""
@@ -139,9 +111,9 @@ class TestLoggingConfiguration:
         # Handler should be a StreamHandler for Lambda
         assert any(isinstance(h, logging.StreamHandler) for h in logger.handlers)
     
-    @patch.dict(os.environ, {'LOG_LEVEL': 'DEBUG'})
-    def test_conditional_debug_logging(self):
+    def test_conditional_debug_logging(self, monkeypatch):
         """Test conditional debug logging pattern."""
+        monkeypatch.setenv('LOG_LEVEL', 'DEBUG')
         logger = configure_logging()
         
         # This pattern is used in bedrock_client.py
@@ -152,9 +124,9 @@ class TestLoggingConfiguration:
             # This should not execute
             assert False, "Should not reach here in DEBUG mode"
     
-    @patch.dict(os.environ, {'LOG_LEVEL': 'INFO'})
-    def test_conditional_debug_logging_info_level(self):
+    def test_conditional_debug_logging_info_level(self, monkeypatch):
         """Test conditional debug logging doesn't execute at INFO level."""
+        monkeypatch.setenv('LOG_LEVEL', 'INFO')
         logger = configure_logging()
         
         # This pattern is used in bedrock_client.py
@@ -1,156 +1,112 @@
-import pytest
-import json
-from unittest.mock import Mock, patch, MagicMock
-import sys
+from unittest.mock import Mock, patch
 import os
-import time
+from types import SimpleNamespace
 
-# Add lambda directories to path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../lambda')))
+import pytest
 
 from triage_handler import handler as triage_handler
-from bedrock_client import BedrockAgentClient
+from tool_handler import handler as tool_handler
 
-class TestProductionReadiness:
-    """Test production readiness scenarios."""
-    
-    @patch.dict(os.environ, {
+THROTTLED = Exception("ThrottlingException: Request was throttled")
+ANALYSIS_COMPLETE = {
+    'output': {
+        'message': {
+            'content': [{
+                'text': 'Analysis complete'
+            }]
+        }
+    }
+}
+
+@pytest.fixture(scope="class")
+def _triage_env():
+    """Triage handler environment, applied once for the whole class."""
+    with patch.dict(os.environ, {
         'BEDROCK_MODEL_ID': 'anthropic.claude-opus-4-1-20250805-v1:0',
         'TOOL_LAMBDA_ARN': 'arn:aws:lambda:us-east-2:123456789012:function:tool-lambda',
         'SNS_TOPIC_ARN': 'arn:aws:sns:us-east-2:123456789012:test-topic'
-    })
-    def test_bedrock_failure_fallback(self, sample_alarm_event, mock_lambda_context):
-        """Test that Bedrock failures provide useful fallback analysis."""
-        with patch('triage_handler.BedrockAgentClient') as mock_bedrock_class:
-            with patch('triage_handler.boto3.client') as mock_boto3:
-                # Setup mocks - Bedrock fails completely
-                mock_bedrock = Mock()
-                mock_bedrock.investigate_with_tools.side_effect = Exception("Bedrock service unavailable")
-                mock_bedrock_class.return_value = mock_bedrock
-                
-                mock_sns = Mock()
-                mock_boto3.return_value = mock_sns
-                
-                # Call handler
-                result = triage_handler(sample_alarm_event, mock_lambda_context)
-                
-                # Should still complete successfully with fallback
-                assert result['statusCode'] == 200
-                
-                # Verify fallback notification was sent
-                mock_sns.publish.assert_called_once()
-                sns_call = mock_sns.publish.call_args
-                assert 'Investigation Error - Bedrock Unavailable' in sns_call[1]['Message']
-                assert 'Manual Investigation Required' in sns_call[1]['Message']
-                assert 'test-lambda-errors' in sns_call[1]['Message']
+    }):
+        yield
+
+@pytest.fixture
+def triage_fakes(monkeypatch):
+    """Swap triage_handler's Bedrock client and boto3 clients via monkeypatch.
+
+    client_kwargs records what the handler passed to BedrockAgentClient.
+    """
+    fakes = SimpleNamespace(bedrock=Mock(), sns=Mock(), client_kwargs={})
     
-    @patch('bedrock_client.boto3.client')
-    def test_bedrock_throttling_retry_logic(self, mock_boto3_client):
-        """Test Bedrock throttling retry logic with exponential backoff."""
-        mock_bedrock_client = Mock()
-        mock_lambda_client = Mock()
-        
-        mock_boto3_client.side_effect = lambda service_name, **kwargs: {
-            'bedrock-runtime': mock_bedrock_client,
-            'lambda': mock_lambda_client
-        }.get(service_name, Mock())
-        
-        # Setup throttling then success
-        throttling_error = Exception("ThrottlingException: Request was throttled")
-        success_response = {
-            'output': {
-                'message': {
-                    'content': [{
-                        'text': 'Analysis complete'
-                    }]
-                }
-            }
-        }
-        mock_bedrock_client.converse.side_effect = [
-            throttling_error,  # First call fails
-            success_response   # Retry succeeds
-        ]
-        
-        with patch('bedrock_client.time.sleep') as mock_sleep:
-            client = BedrockAgentClient('test-model', 'test-arn')
-            
-            # This should retry and succeed
-            result = client.investigate_with_tools("Test prompt")
-            
-            assert isinstance(result, dict) and result.get("report", "") == 'Analysis complete'
-            assert mock_bedrock_client.converse.call_count == 2
-            mock_sleep.assert_called_once_with(2)  # First retry delay
+    def make_bedrock_client(**kwargs):
+        fakes.client_kwargs = kwargs
+        return fakes.bedrock
+    
+    monkeypatch.setattr('triage_handler.BedrockAgentClient', make_bedrock_client)
+    monkeypatch.setattr('triage_handler.boto3.client', lambda *args, **kwargs: fakes.sns)
+    return fakes
+
+@pytest.fixture
+def bedrock_sleep(monkeypatch):
+    """Stub out bedrock_client's retry backoff; the Mock records the delays."""
+    sleep = Mock()
+    monkeypatch.setattr('bedrock_client.time.sleep', sleep)
+    return sleep
+
+@pytest.fixture
+def bedrock_and_lambda(patched_boto3):
+    """(bedrock-runtime, lambda) fakes behind the shared bedrock_client."""
+    return patched_boto3['bedrock-runtime'], patched_boto3['lambda']
+
+# Every test gets the stubbed sleep, so none can sit through real backoff
+@pytest.mark.usefixtures("_triage_env", "bedrock_sleep")
+class TestProductionReadiness:
+    """Test production readiness scenarios."""
     
-    @patch('bedrock_client.boto3.client')
-    def test_bedrock_max_retries_exceeded(self, mock_boto3_client):
-        """Test that max retries are respected for throttling."""
-        mock_bedrock_client = Mock()
-        mock_lambda_client = Mock()
-        
-        mock_boto3_client.side_effect = lambda service_name, **kwargs: {
-            'bedrock-runtime': mock_bedrock_client,
-            'lambda': mock_lambda_client
-        }.get(service_name, Mock())
-        
-        # Always return throttling error
-        throttling_error = Exception("ThrottlingException: Request was throttled")
-        mock_bedrock_client.converse.side_effect = throttling_error
-        
-        with patch('bedrock_client.time.sleep') as mock_sleep:
-            client = BedrockAgentClient('test-model', 'test-arn')
-            
-            # Should eventually return fallback after max retries
-            result = client.investigate_with_tools("Test prompt")
-            
-            # Should return fallback error message
-            assert isinstance(result, dict)
-            assert "Investigation Error" in result.get("report", "")
-            assert "ThrottlingException" in result.get("report", "")
-            # Should try initial + 3 retries = 4 total calls
-            assert mock_bedrock_client.converse.call_count == 4
-            # Should have 3 sleep calls (for 3 retries)
-            assert mock_sleep.call_count == 3
+    def test_bedrock_failure_fallback(self, triage_fakes, sample_alarm_event, mock_lambda_context):
+        """Test that Bedrock failures provide useful fallback analysis."""
+        # Setup mocks - Bedrock fails completely
+        triage_fakes.bedrock.investigate_with_tools.side_effect = Exception("Bedrock service unavailable")
+        
+        # Call handler
+        result = triage_handler(sample_alarm_event, mock_lambda_context)
+        
+        # Should still complete successfully with fallback
+        assert result['statusCode'] == 200
+        
+        # Verify fallback notification was sent
+        triage_fakes.sns.publish.assert_called_once()
+        sns_call = triage_fakes.sns.publish.call_args
+        assert 'Investigation Error - Bedrock Unavailable' in sns_call[1]['Message']
+        assert 'Manual Investigation Required' in sns_call[1]['Message']
+        assert 'test-lambda-errors' in sns_call[1]['Message']
     
-    @patch('bedrock_client.boto3.client')
-    def test_bedrock_non_throttling_error_immediate_failure(self, mock_boto3_client):
-        """Test that non-throttling errors fail immediately without retries."""
-        mock_bedrock_client = Mock()
-        mock_lambda_client = Mock()
-        
-        mock_boto3_client.side_effect = lambda service_name, **kwargs: {
-            'bedrock-runtime': mock_bedrock_client,
-            'lambda': mock_lambda_client
-        }.get(service_name, Mock())
-        
-        # Non-throttling error
-        validation_error = Exception("ValidationException: Invalid model ID")
-        mock_bedrock_client.converse.side_effect = validation_error
-        
-        with patch('bedrock_client.time.sleep') as mock_sleep:
-            client = BedrockAgentClient('test-model', 'test-arn')
-            
-            # Should return fallback immediately
-            result = client.investigate_with_tools("Test prompt")
-            
-            # Should return fallback error message  
-            assert isinstance(result, dict)
-            assert "Investigation Error" in result.get("report", "")
-            assert "ValidationException" in result.get("report", "")
-            # Should only try once
-            assert mock_bedrock_client.converse.call_count == 1
-            # Should not sleep/retry
-            mock_sleep.assert_not_called()
+    @pytest.mark.parametrize("effects,calls,delays,recovered,needle", [
+        # Throttled once, retry succeeds after the first backoff
+        pytest.param([THROTTLED, ANALYSIS_COMPLETE], 2, (2,), True, 'Analysis complete', id='throttle-then-success'),
+        # Always throttled: initial + 3 retries, exponential backoff, then fallback
+        pytest.param(THROTTLED, 4, (2, 4, 8), False, 'ThrottlingException', id='max-retries-exceeded'),
+        # Non-throttling errors fail immediately without retries
+        pytest.param(Exception("ValidationException: Invalid model ID"), 1, (), False, 'ValidationException', id='non-throttling-error'),
+    ])
+    def test_bedrock_retry_behaviour(self, bedrock_and_lambda, bedrock_client, bedrock_sleep, effects, calls, delays, recovered, needle):
+        """Test Bedrock throttling retries, the retry cap and non-retryable errors."""
+        mock_bedrock_client, _ = bedrock_and_lambda
+        mock_bedrock_client.converse.side_effect = effects
+        
+        result = bedrock_client.investigate_with_tools("Test prompt")
+        
+        assert isinstance(result, dict)
+        report = result.get("report", "")
+        assert needle in report
+        if recovered:
+            assert report == needle
+        else:
+            assert "Investigation Error" in report  # Fallback message
+        assert mock_bedrock_client.converse.call_count == calls
+        assert [c.args[0] for c in bedrock_sleep.call_args_list] == list(delays)
     
-    @patch('bedrock_client.boto3.client')
-    def test_tool_lambda_timeout_handling(self, mock_boto3_client):
+    def test_tool_lambda_timeout_handling(self, bedrock_and_lambda, bedrock_client):
         """Test handling when tool Lambda times out."""
-        mock_bedrock_client = Mock()
-        mock_lambda_client = Mock()
-        
-        mock_boto3_client.side_effect = lambda service_name, **kwargs: {
-            'bedrock-runtime': mock_bedrock_client,
-            'lambda': mock_lambda_client
-        }.get(service_name, Mock())
+        mock_bedrock_client, mock_lambda_client = bedrock_and_lambda
         
         # Mock Bedrock requesting tool then providing final response
         bedrock_responses = [
@@ -179,16 +135,13 @@ class TestProductionReadiness:
         # Mock Lambda timeout
         mock_lambda_client.invoke.side_effect = Exception("Lambda timeout")
         
-        client = BedrockAgentClient('test-model', 'test-arn')
-        result = client.investigate_with_tools("Test prompt")
+        result = bedrock_client.investigate_with_tools("Test prompt")
         
         # Should handle timeout gracefully and continue
         assert isinstance(result, dict) and 'Tool timed out but continuing' in result.get("report", "")
     
     def test_tool_lambda_memory_and_performance_limits(self, mock_lambda_context):
         """Test tool Lambda handles large outputs and memory constraints."""
-        from tool_handler import handler as tool_handler
-        
         # Test large output handling (no longer truncated)
         event = {
             'command': 'result = "A" * 100000'  # 100KB of data
@@ -197,34 +150,22 @@ class TestProductionReadiness:
         result = tool_handler(event, mock_lambda_context)
         
         assert result['statusCode'] == 200
-        body = json.loads(result['body'])
-        # Should NOT be truncated anymore
-        assert len(body['output']) >= 100000  # Full 100KB should be present
+        body = result['body']
+        # Should NOT be truncated anymore: every one of the 100KB is present
+        assert body['output'].count('A') == 100000
         
-    @patch.dict(os.environ, {
-        'BEDROCK_MODEL_ID': 'anthropic.claude-opus-4-1-20250805-v1:0',
-        'TOOL_LAMBDA_ARN': 'arn:aws:lambda:us-east-2:123456789012:function:tool-lambda',
-        'SNS_TOPIC_ARN': 'arn:aws:sns:us-east-2:123456789012:test-topic'
-    })
-    def test_token_limit_handling(self, sample_alarm_event, mock_lambda_context):
+    def test_token_limit_handling(self, triage_fakes, sample_alarm_event, mock_lambda_context):
         """Test handling when model limits are reached."""
-        with patch('triage_handler.BedrockAgentClient') as mock_bedrock_class:
-            with patch('triage_handler.boto3.client') as mock_boto3:
-                # Setup mocks
-                mock_bedrock = Mock()
-                mock_bedrock.investigate_with_tools.return_value = {"report": "Analysis completed", "full_context": [], "iteration_count": 1, "tool_calls": []}
-                mock_bedrock_class.return_value = mock_bedrock
-                
-                mock_sns = Mock()
-                mock_boto3.return_value = mock_sns
-                
-                # Call handler
-                result = triage_handler(sample_alarm_event, mock_lambda_context)
-                
-                # Verify BedrockAgentClient was initialized correctly (no max_tokens)
-                mock_bedrock_class.assert_called_with(
-                    model_id='anthropic.claude-opus-4-1-20250805-v1:0',
-                    tool_lambda_arn='arn:aws:lambda:us-east-2:123456789012:function:tool-lambda'
-                )
-                
-                assert result['statusCode'] == 200
\ No newline at end of file
+        # Setup mocks
+        triage_fakes.bedrock.investigate_with_tools.return_value = {"report": "Analysis completed", "full_context": [], "iteration_count": 1, "tool_calls": []}
+        
+        # Call handler
+        result = triage_handler(sample_alarm_event, mock_lambda_context)
+        
+        # Verify BedrockAgentClient was initialized correctly (no max_tokens)
+        assert triage_fakes.client_kwargs == {
+            'model_id': 'anthropic.claude-opus-4-1-20250805-v1:0',
+            'tool_lambda_arn': 'arn:aws:lambda:us-east-2:123456789012:function:tool-lambda'
+        }
+        
+        assert result['statusCode'] == 200
@@ -1,12 +1,8 @@
-import pytest
-import json
-from unittest.mock import Mock, patch, call
-import sys
+from unittest.mock import Mock, patch
 import os
 import time
 from datetime import datetime, timedelta
-
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../lambda')))
+from types import SimpleNamespace
 
 from bedrock_client import BedrockAgentClient
 from triage_handler import handler as triage_handler
@@ -154,9 +150,12 @@ class TestResourceLimitsAndScaling:
     })
     def test_lambda_memory_and_timeout_under_load(self, sample_alarm_event, mock_lambda_context):
         """Test Lambda behavior under memory and timeout pressure."""
-        # Mock Lambda context with resource constraints
-        mock_lambda_context.get_remaining_time_in_millis.return_value = 5000  # 5 seconds left
-        mock_lambda_context.memory_limit_in_mb = '512'  # Limited memory
+        # Lambda context with resource constraints (the shared fixture stays untouched)
+        constrained_context = SimpleNamespace(**{
+            **vars(mock_lambda_context),
+            'get_remaining_time_in_millis': lambda: 5000,  # 5 seconds left
+            'memory_limit_in_mb': '512'  # Limited memory
+        })
         
         with patch('triage_handler.BedrockAgentClient') as mock_bedrock:
             with patch('triage_handler.boto3.client') as mock_boto3:
@@ -170,7 +169,7 @@ class TestResourceLimitsAndScaling:
                 mock_boto3.return_value = mock_sns
                 
                 start_time = time.time()
-                result = triage_handler(sample_alarm_event, mock_lambda_context)
+                result = triage_handler(sample_alarm_event, constrained_context)
                 end_time = time.time()
                 
                 # Should complete despite resource constraints  
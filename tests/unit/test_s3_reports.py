@@ -1,12 +1,6 @@
-import pytest
 import json
-from unittest.mock import Mock, patch, MagicMock, call
-import sys
+from unittest.mock import Mock, patch
 import os
-from datetime import datetime
-from decimal import Decimal
-
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../lambda')))
 
 from triage_handler import save_enhanced_reports_to_s3, format_notification, handler
 
@@ -1,13 +1,6 @@
-import pytest
-import json
-from unittest.mock import Mock, patch, MagicMock
-import subprocess
-import sys
-import os
+from unittest.mock import Mock, patch
 
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../tool-lambda')))
-
-from tool_handler import lambda_handler, handler, execute_python_code
+from tool_handler import handler, execute_python_code
 
 class TestToolHandler:
     
@@ -20,7 +13,7 @@ class TestToolHandler:
         result = handler(event, mock_lambda_context)
         
         assert result['statusCode'] == 200
-        body = json.loads(result['body'])
+        body = result['body']
         assert body['success'] is True
         assert 'Hello from Python' in body['output'] or 'Hello from Python' in body['result']
     
@@ -44,7 +37,7 @@ result = {"account": "123456789012", "user": "test-user"}'''
             result = handler(event, mock_lambda_context)
             
             assert result['statusCode'] == 200
-            body = json.loads(result['body'])
+            body = result['body']
             assert body['success'] is True
     
     def test_handler_empty_command(self, mock_lambda_context):
@@ -56,7 +49,7 @@ result = {"account": "123456789012", "user": "test-user"}'''
         result = handler(event, mock_lambda_context)
         
         assert result['statusCode'] == 200
-        body = json.loads(result['body'])
+        body = result['body']
         # Empty command should still succeed but with minimal output
         assert body['success'] is True
     
@@ -69,7 +62,7 @@ result = {"account": "123456789012", "user": "test-user"}'''
         result = handler(event, mock_lambda_context)
         
         assert result['statusCode'] == 200
-        body = json.loads(result['body'])
+        body = result['body']
         assert body['success'] is False
         assert 'ValueError' in body['output']
     
@@ -82,7 +75,7 @@ result = {"account": "123456789012", "user": "test-user"}'''
         result = handler(event, mock_lambda_context)
         
         assert result['statusCode'] == 200
-        body = json.loads(result['body'])
+        body = result['body']
         assert body['success'] is False
         assert 'SyntaxError' in body['output'] or 'invalid syntax' in body['output']
     
@@ -95,7 +88,7 @@ result = {"account": "123456789012", "user": "test-user"}'''
         result = handler(event, mock_lambda_context)
         
         assert result['statusCode'] == 200
-        body = json.loads(result['body'])
+        body = result['body']
         # Check that output is NOT truncated (should have full 60KB)
         assert len(body.get('result', '')) == 60000 or len(body.get('output', '')) == 60000
         # Should NOT contain truncation message
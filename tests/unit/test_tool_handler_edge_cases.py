@@ -1,12 +1,6 @@
-import pytest
-import json
 from unittest.mock import Mock, patch
-import sys
-import os
 
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../tool-lambda')))
-
-from tool_handler import handler, lambda_handler, execute_python_code
+from tool_handler import handler, execute_python_code
 
 class TestToolHandlerEdgeCases:
     """Test edge cases and error scenarios for tool handler."""
@@ -20,7 +14,7 @@ class TestToolHandlerEdgeCases:
         result = handler(event, mock_lambda_context)
         
         assert result['statusCode'] == 200
-        body = json.loads(result['body'])
+        body = result['body']
         assert body['success'] is True
         assert body['result'] is None
         assert body['stdout'] == ''
@@ -38,7 +32,7 @@ print("Done!")
         result = handler(event, mock_lambda_context)
         
         assert result['statusCode'] == 200
-        body = json.loads(result['body'])
+        body = result['body']
         assert body['success'] is True
         assert 'Processing...' in body['stdout']
         assert 'Done!' in body['stdout']
@@ -60,7 +54,7 @@ print("Done!")
         assert sys.stdout is original_stdout
         
         assert result['statusCode'] == 200  # Error status
-        body = json.loads(result['body'])
+        body = result['body']
         assert body['success'] is False
         assert 'ValueError' in body['output']
         assert 'Test exception' in body['output']
@@ -74,7 +68,7 @@ print("Done!")
         result = handler(event, mock_lambda_context)
         
         assert result['statusCode'] == 200
-        body = json.loads(result['body'])
+        body = result['body']
         assert body['success'] is False
         assert 'SyntaxError' in body['output'] or 'invalid syntax' in body['output']
     
@@ -87,7 +81,7 @@ print("Done!")
         result = handler(event, mock_lambda_context)
         
         assert result['statusCode'] == 200
-        body = json.loads(result['body'])
+        body = result['body']
         assert body['success'] is False
         assert 'NameError' in body['output']
     
@@ -131,7 +125,7 @@ result = f"datetime={dt.year}, base64={b64}, uuid_len={len(uid)}"
         result = handler(event, mock_lambda_context)
         
         assert result['statusCode'] == 200
-        body = json.loads(result['body'])
+        body = result['body']
         assert body['success'] is True
         assert 'datetime=' in body['result']
         assert 'base64=dGVzdA==' in body['result']
@@ -159,7 +153,7 @@ except Exception as e:
             result = handler(event, mock_lambda_context)
             
             assert result['statusCode'] == 200
-            body = json.loads(result['body'])
+            body = result['body']
             assert body['success'] is True
             assert 'Expected error' in body['result']
     
@@ -173,7 +167,7 @@ except Exception as e:
         result = handler(event, mock_lambda_context)
         
         assert result['statusCode'] == 200
-        body = json.loads(result['body'])
+        body = result['body']
         assert body['success'] is True
         # Check that result is NOT truncated (full 60KB)
         assert len(body['result']) == 60000
@@ -189,7 +183,7 @@ except Exception as e:
         result = handler(event, mock_lambda_context)
         
         assert result['statusCode'] == 200
-        body = json.loads(result['body'])
+        body = result['body']
         assert body['success'] is True
         # Empty command executes successfully but produces no output
         assert body['result'] is None
@@ -212,7 +206,7 @@ result = calculate(5, 3)
         result = handler(event, mock_lambda_context)
         
         assert result['statusCode'] == 200
-        body = json.loads(result['body'])
+        body = result['body']
         assert body['success'] is True
         assert body['result'] == '10'
     
@@ -228,6 +222,6 @@ result = json.loads("not valid json")
         result = handler(event, mock_lambda_context)
         
         assert result['statusCode'] == 200
-        body = json.loads(result['body'])
+        body = result['body']
         assert body['success'] is False
         assert 'JSONDecodeError' in body['output'] or 'ValueError' in body['output']
\ No newline at end of file
@@ -1,11 +1,5 @@
-import pytest
-import json
-from unittest.mock import Mock, patch
-import sys
 import os
 
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../tool-lambda')))
-
 class TestToolHandlerMain:
     """Test the main execution block of tool_handler.py."""
     
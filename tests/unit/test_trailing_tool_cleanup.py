@@ -1,16 +1,10 @@
 """Tests for trailing tool call cleanup in Bedrock client responses."""
 
-import pytest
-from unittest.mock import MagicMock, patch, call
-import sys
+from unittest.mock import MagicMock, patch
 import os
 
-# Add the lambda directory to the path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../lambda')))
-
 from bedrock_client import BedrockAgentClient
 
-
 class TestTrailingToolCleanup:
     """Test cleanup of trailing tool calls that Nova Premier sometimes appends."""
     
@@ -1,12 +1,7 @@
-import pytest
 import json
-from unittest.mock import Mock, patch, MagicMock
-import sys
+from unittest.mock import Mock, patch
 import os
 
-# Add lambda directory to path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../lambda')))
-
 from triage_handler import handler, format_notification
 
 class TestTriageHandler:
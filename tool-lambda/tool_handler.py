@@ -68,16 +68,17 @@ def lambda_handler(event, context):
                 combined_output += "\n"
             combined_output += execution_result['result']
         
+        # The body stays a dict; the Lambda runtime serializes the response once
         return {
             'statusCode': 200,  # Always return 200 for controlled errors (success flag indicates actual status)
-            'body': json.dumps({
+            'body': {
                 'success': execution_result['success'],
                 'output': combined_output,  # Backward compatibility
                 'result': execution_result['result'],
                 'stdout': execution_result['stdout'],
                 'stderr': execution_result['stderr'],
                 'execution_time': execution_result['execution_time']
-            })
+            }
         }
         
     except Exception as e:
@@ -85,10 +86,10 @@ def lambda_handler(event, context):
         logger.error(error_msg)
         return {
             'statusCode': 500,
-            'body': json.dumps({
+            'body': {
                 'success': False,
                 'output': error_msg[:5000]  # Limit error message size
-            })
+            }
         }
 
 